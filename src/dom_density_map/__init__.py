@@ -3,12 +3,13 @@
 __version__ = "0.1.0"
 
 from .cdp import CDP, get_ws_url, is_chrome_running
-from .core import render_density_map, render_sparse_map, render_elements_at
+from .core import build_grid, render_density_map, render_sparse_map, render_elements_at
 
 __all__ = [
     "CDP",
     "get_ws_url",
     "is_chrome_running",
+    "build_grid",
     "render_density_map",
     "render_sparse_map",
     "render_elements_at",
@@ -5,11 +5,46 @@ no profile management, no TikTok/Reddit specifics.
 """
 
 import json
+import re
 import asyncio
 import urllib.request
 
 import websockets
 
+try:
+    import orjson
+except ImportError:  # optional: stdlib json works, just slower on big frames
+    orjson = None
+
+if orjson is not None:
+    _loads = orjson.loads
+    _dumps = orjson.dumps
+else:
+    _loads = json.loads
+
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(',', ':')).encode()
+
+# Only frames containing our response id or this event get JSON-decoded
+_DIALOG_TOKEN = b'"Page.javascriptDialogOpening"'
+# Top-frame navigation drops compiled scripts; this event is parsed so
+# subframe (iframe) navigations can be ignored
+_NAVIGATED_TOKEN = b'"Page.frameNavigated"'
+
+# Serialized '"method":...}' tails of param-less commands, keyed by method
+_FRAME_TAILS = {}
+
+
+def _encode(msg_id: int, method: str, params: dict = None) -> bytes:
+    """Serialize a CDP command to UTF-8 bytes, reusing cached param-less tails."""
+    if params:
+        tail = _dumps({"method": method, "params": params})[1:]
+    else:
+        tail = _FRAME_TAILS.get(method)
+        if tail is None:
+            tail = _FRAME_TAILS[method] = _dumps({"method": method})[1:]
+    return b'{"id":%d,' % msg_id + tail
+
 
 class CDP:
     """Minimal CDP client over websocket."""
@@ -18,35 +53,56 @@ class CDP:
         self.ws_url = ws_url
         self.ws = None
         self._id = 0
+        self._scripts = {}  # expression -> scriptId from Runtime.compileScript
+        self._runtime_enabled = False
 
     async def connect(self):
         self.ws = await websockets.connect(self.ws_url, max_size=50 * 1024 * 1024)
         await self.send("Page.enable")
 
     async def send(self, method: str, params: dict = None) -> dict:
+        return (await self._request(method, params)).get("result", {})
+
+    async def _call(self, method: str, params: dict = None) -> dict:
+        """Like send, but raise on a protocol error instead of returning {}."""
+        resp = await self._request(method, params)
+        if "error" in resp:
+            raise RuntimeError(f"{method} failed: {resp['error'].get('message')}")
+        return resp.get("result", {})
+
+    async def _request(self, method: str, params: dict = None) -> dict:
+        """Send a command and return its full response (result or error)."""
         self._id += 1
-        msg = {"id": self._id, "method": method}
-        if params:
-            msg["params"] = params
-        await self.ws.send(json.dumps(msg))
+        msg_id = self._id
+        # Already UTF-8: send as a text frame without a str round-trip
+        await self.ws.send(_encode(msg_id, method, params), text=True)
+        id_pattern = re.compile(rb'"id":\s*%d\b' % msg_id)
         while True:
-            resp = json.loads(await self.ws.recv())
+            raw = await self.ws.recv(decode=False)
+            # Cheap byte scan before parsing: most frames are events we drop
+            if (_DIALOG_TOKEN not in raw and _NAVIGATED_TOKEN not in raw
+                    and not id_pattern.search(raw)):
+                continue
+            resp = _loads(raw)
+            if resp.get("method") == "Page.frameNavigated":
+                frame = resp.get("params", {}).get("frame", {})
+                if "parentId" not in frame:
+                    self._scripts.clear()
+                continue
             # Auto-dismiss browser dialogs (beforeunload, alerts, etc.)
             if resp.get("method") == "Page.javascriptDialogOpening":
                 self._id += 1
-                await self.ws.send(json.dumps({
-                    "id": self._id,
-                    "method": "Page.handleJavaScriptDialog",
-                    "params": {"accept": True},
-                }))
+                await self.ws.send(_encode(self._id, "Page.handleJavaScriptDialog",
+                                           {"accept": True}), text=True)
                 continue
-            if resp.get("id") == msg["id"]:
-                return resp.get("result", {})
+            if resp.get("id") == msg_id:
+                return resp
 
     async def navigate(self, url: str, wait: float = 5):
         """Navigate to a URL, disabling beforeunload first."""
         await self.execute_js("window.onbeforeunload = null")
         await self.send("Page.navigate", {"url": url})
+        self._scripts.clear()
         await asyncio.sleep(wait)
 
     async def execute_js(self, expression: str) -> dict:
@@ -56,6 +112,39 @@ class CDP:
             "returnByValue": True,
         })
 
+    async def run_script(self, expression: str) -> dict:
+        """Like execute_js, but compile once per page and re-run by scriptId.
+
+        Only pays off when the same CDP connection runs an expression
+        repeatedly: the first call costs two round-trips (compile + run),
+        and each compiled script stays in the page until it navigates.
+        """
+        # compileScript/runScript are rejected until the Runtime agent is on
+        if not self._runtime_enabled:
+            await self._call("Runtime.enable")
+            self._runtime_enabled = True
+        for _ in range(2):
+            script_id = self._scripts.get(expression)
+            if script_id is None:
+                compiled = await self._call("Runtime.compileScript", {
+                    "expression": expression,
+                    "sourceURL": "",
+                    "persistScript": True,
+                })
+                if "exceptionDetails" in compiled:
+                    # Compile error: evaluate directly to surface the exception
+                    return await self.execute_js(expression)
+                script_id = self._scripts[expression] = compiled["scriptId"]
+            resp = await self._request("Runtime.runScript", {
+                "scriptId": script_id,
+                "returnByValue": True,
+            })
+            if "error" not in resp:
+                return resp.get("result", {})
+            # scriptId went stale (page navigated), recompile once
+            self._scripts.pop(expression, None)
+        raise RuntimeError(f"Runtime.runScript failed: {resp['error'].get('message')}")
+
     async def close(self):
         if self.ws:
             await self.ws.close()
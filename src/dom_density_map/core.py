@@ -16,87 +16,191 @@ Usage:
 """
 
 import asyncio
+import base64
+import functools
 import sys
 
+import numpy as np
+
 from .cdp import CDP, get_ws_url, is_chrome_running
 
 # ---------------------------------------------------------------------------
 # Stage 1: JavaScript DOM walker (runs in browser via Runtime.evaluate)
 # ---------------------------------------------------------------------------
 
-DOM_WALKER_JS = r"""
-(function() {
+# Shared walker body: defines vw/vh, PRIORITY, walk(visit) and labelOf(el). walk()
+# calls visit(el, x, y, w, h, kind, isInteractive) with the viewport-clamped,
+# rounded box of each visible element (up to CAP) and returns the count.
+_WALK_JS = r"""
     var vw = window.innerWidth, vh = window.innerHeight;
-    var all = document.querySelectorAll('*');
-    var elems = [];
-    var CAP = 2000;
+    var PRIORITY = {T: 1, I: 2, L: 3, F: 4, B: 5};
+    // Tags that can classify as B/F/L/I; anything else can only become T
+    var SPECIAL = {__proto__: null, button: 1, input: 1, textarea: 1, select: 1,
+                   a: 1, img: 1, video: 1, canvas: 1, svg: 1};
+
+    // Text block check (direct text nodes only)
+    function hasText(el) {
+        var directText = '';
+        for (var c = 0; c < el.childNodes.length; c++) {
+            if (el.childNodes[c].nodeType === 3) {
+                directText += el.childNodes[c].textContent;
+            }
+        }
+        return directText.trim().length > 20;
+    }
 
-    for (var i = 0; i < all.length && elems.length < CAP; i++) {
-        var el = all[i];
-        var st = window.getComputedStyle(el);
-        if (st.display === 'none' || st.visibility === 'hidden') continue;
-        if (parseFloat(st.opacity) === 0) continue;
+    function walk(visit) {
+        var all = document.querySelectorAll('*');
+        var n = 0;
+        var CAP = 2000;
+
+        for (var i = 0; i < all.length && n < CAP; i++) {
+            var el = all[i];
+            // Geometry first: off-screen and display:none (zero-size) elements
+            // are rejected before paying for a computed-style lookup
+            var r = el.getBoundingClientRect();
+            if (r.width <= 0 || r.height <= 0 ||
+                r.right < 0 || r.bottom < 0 || r.left > vw || r.top > vh) continue;
+
+            var st = window.getComputedStyle(el);
+            if (st.display === 'none' || st.visibility === 'hidden') continue;
+            if (parseFloat(st.opacity) === 0) continue;
+
+            // Clamp to viewport
+            var x = r.left > 0 ? r.left : 0;
+            var y = r.top > 0 ? r.top : 0;
+            var w = (r.right < vw ? r.right : vw) - x;
+            var h = (r.bottom < vh ? r.bottom : vh) - y;
+            if (w <= 0 || h <= 0) continue;
+
+            // Classify element type (first match)
+            var tag = el.tagName.toLowerCase();
+            var role = el.getAttribute('role');
+            var k = null;  // kind
+            var isInteractive = false;
+
+            if (!SPECIAL[tag] && role !== 'button' && role !== 'textbox' &&
+                el.contentEditable !== 'true') {
+                // Most common case: a plain container, checked first
+                if (hasText(el)) k = 'T';
+            } else if (tag === 'button' || role === 'button' ||
+                (tag === 'input' && (el.type === 'button' || el.type === 'submit' || el.type === 'reset'))) {
+                k = 'B'; isInteractive = true;
+            } else if (tag === 'input' || tag === 'textarea' || tag === 'select' ||
+                       el.contentEditable === 'true' || role === 'textbox') {
+                k = 'F'; isInteractive = true;
+            } else if (tag === 'a' && el.href) {
+                k = 'L'; isInteractive = true;
+            } else if (tag === 'img' || tag === 'video' || tag === 'canvas' || tag === 'svg') {
+                k = 'I';
+            } else if (hasText(el)) {
+                k = 'T';  // e.g. <a> without href
+            }
 
-        var r = el.getBoundingClientRect();
-        if (r.width <= 0 || r.height <= 0) continue;
-        if (r.right < 0 || r.bottom < 0 || r.left > vw || r.top > vh) continue;
+            visit(el, Math.round(x), Math.round(y), Math.round(w), Math.round(h),
+                  k, isInteractive);
+            n++;
+        }
+        return n;
+    }
 
-        // Clamp to viewport
-        var x = Math.max(0, r.left);
-        var y = Math.max(0, r.top);
-        var w = Math.min(r.right, vw) - x;
-        var h = Math.min(r.bottom, vh) - y;
-        if (w <= 0 || h <= 0) continue;
+    // Label for interactive elements
+    function labelOf(el) {
+        var label = el.getAttribute('aria-label') ||
+                    (el.textContent || '').trim().substring(0, 60) ||
+                    el.title || el.placeholder || '';
+        label = label.replace(/\s+/g, ' ').trim();
+        if (label.length > 60) label = label.substring(0, 57) + '...';
+        return label;
+    }
+"""
 
-        // Classify element type (first match)
-        var tag = el.tagName.toLowerCase();
-        var role = el.getAttribute('role');
-        var k = null;  // kind
-        var isInteractive = false;
-
-        if (tag === 'button' || role === 'button' ||
-            (tag === 'input' && (el.type === 'button' || el.type === 'submit' || el.type === 'reset'))) {
-            k = 'B'; isInteractive = true;
-        } else if (tag === 'input' || tag === 'textarea' || tag === 'select' ||
-                   el.contentEditable === 'true' || role === 'textbox') {
-            k = 'F'; isInteractive = true;
-        } else if (tag === 'a' && el.href) {
-            k = 'L'; isInteractive = true;
-        } else if (tag === 'img' || tag === 'video' || tag === 'canvas' || tag === 'svg') {
-            k = 'I';
-        } else {
-            // Check for text content (direct text nodes only)
-            var directText = '';
-            for (var c = 0; c < el.childNodes.length; c++) {
-                if (el.childNodes[c].nodeType === 3) {
-                    directText += el.childNodes[c].textContent;
-                }
-            }
-            if (directText.trim().length > 20) {
-                k = 'T';
+# Columnar output: one array per field instead of a dict per element.
+# ks holds PRIORITY codes (0 = none); labels has one entry per element with
+# iflag set, in order.
+DOM_WALKER_JS = r"""
+(function() {
+""" + _WALK_JS + r"""
+    var xs = [], ys = [], ws = [], hs = [], ks = [], iflag = [], labels = [];
+    walk(function(el, x, y, w, h, k, isInteractive) {
+        xs.push(x); ys.push(y); ws.push(w); hs.push(h);
+        ks.push(k ? PRIORITY[k] : 0);
+        iflag.push(isInteractive ? 1 : 0);
+        if (isInteractive) labels.push(labelOf(el));
+    });
+
+    return {vw: vw, vh: vh, count: xs.length,
+            xs: xs, ys: ys, ws: ws, hs: hs, ks: ks, iflag: iflag, labels: labels};
+})()
+"""
+
+# Rasterizes in the browser: returns the density/kinds grids (uint8,
+# row-major, base64) and the first 50 interactive elements instead of the
+# element list. Format with the max column count.
+DOM_RASTER_JS = r"""
+(function(maxCols) {
+""" + _WALK_JS + r"""
+    var cols = Math.min(maxCols, vw);
+    var cell = vw / cols;
+    // Round half to even, like Python's round() in build_grid
+    var q = vh / cell, f = Math.floor(q);
+    var rows = Math.max(1, q - f === 0.5 ? f + (f & 1) : Math.round(q));
+    if (cols * rows > 16000) rows = Math.floor(16000 / cols);
+
+    var density = new Uint8Array(rows * cols);  // saturates at 255
+    var kinds = new Uint8Array(rows * cols);    // PRIORITY code, 0 = none
+    var interactive = [];
+
+    function clamp(v, hi) { return v < 0 ? 0 : (v > hi ? hi : v); }
+
+    var count = walk(function(el, x, y, w, h, k, isInteractive) {
+        var c0 = clamp(Math.trunc(x / cell), cols - 1);
+        var c1 = clamp(Math.trunc((x + w - 1) / cell), cols - 1);
+        var r0 = clamp(Math.trunc(y / cell), rows - 1);
+        var r1 = clamp(Math.trunc((y + h - 1) / cell), rows - 1);
+        var pri = k ? PRIORITY[k] : 0;
+
+        for (var r = r0; r <= r1; r++) {
+            for (var idx = r * cols + c0, end = r * cols + c1; idx <= end; idx++) {
+                if (density[idx] < 255) density[idx]++;
+                if (pri > kinds[idx]) kinds[idx] = pri;
             }
         }
 
-        var entry = {x: Math.round(x), y: Math.round(y),
-                     w: Math.round(w), h: Math.round(h)};
-        if (k) entry.k = k;
-
-        // Capture label for interactive elements
         if (isInteractive) {
-            entry.i = true;
-            var label = el.getAttribute('aria-label') ||
-                        (el.textContent || '').trim().substring(0, 60) ||
-                        el.title || el.placeholder || '';
-            label = label.replace(/\s+/g, ' ').trim();
-            if (label.length > 60) label = label.substring(0, 57) + '...';
-            if (label) entry.l = label;
+            // Keep only the first 50 top-to-bottom, left-to-right, sorted as
+            // we go; equal keys insert after existing ones (document order).
+            // Rejected elements never pay for labelOf().
+            var gc = Math.trunc((x + w / 2) / cell), gr = Math.trunc((y + h / 2) / cell);
+            var len = interactive.length, last = interactive[len - 1];
+            if (len < 50 || gr < last.gr || (gr === last.gr && gc < last.gc)) {
+                var lo = 0, hi = len;
+                while (lo < hi) {
+                    var mid = (lo + hi) >> 1, m = interactive[mid];
+                    if (m.gr < gr || (m.gr === gr && m.gc <= gc)) lo = mid + 1;
+                    else hi = mid;
+                }
+                interactive.splice(lo, 0, {
+                    kind: k, label: labelOf(el), gc: gc, gr: gr,
+                    px: Math.trunc(x + w / 2), py: Math.trunc(y + h / 2)
+                });
+                if (interactive.length > 50) interactive.pop();
+            }
         }
+    });
 
-        elems.push(entry);
+    function b64(bytes) {
+        var s = '';
+        for (var i = 0; i < bytes.length; i += 8192) {
+            s += String.fromCharCode.apply(null, bytes.subarray(i, i + 8192));
+        }
+        return btoa(s);
     }
 
-    return {vw: vw, vh: vh, count: elems.length, elements: elems};
-})()
+    return {vw: vw, vh: vh, count: count, cols: cols, rows: rows,
+            density: b64(density), kinds: b64(kinds),
+            interactive: interactive};
+})(%d)
 """
 
 ELEMENTS_AT_JS = r"""
@@ -155,6 +259,23 @@ ELEMENTS_AT_JS = r"""
 })(%d, %d)
 """
 
+# Grid-coordinate lookup in one evaluation: converts (col, row) to pixels
+# with the live viewport width, then runs ELEMENTS_AT_JS at that point.
+# Format with (col, row, max_cols).
+ELEMENTS_AT_GRID_JS = r"""
+(function(gc, gr, cols) {
+    var cell = window.innerWidth / cols;
+    var px = Math.trunc(gc * cell + cell / 2);
+    var py = Math.trunc(gr * cell + cell / 2);
+    return {px: px, py: py, elements: """ + ELEMENTS_AT_JS.replace('(%d, %d)', '(px, py)') + r"""};
+})(%d, %d, %d)
+"""
+
+# Page title, URL and rasterized map in one round-trip. Format with max_cols.
+PAGE_MAP_JS = r"""
+({title: document.title, url: window.location.href, map: """ + DOM_RASTER_JS + r"""})
+"""
+
 
 def render_elements_at(elements, px, py):
     """Format the elementsFromPoint result as readable text."""
@@ -202,8 +323,10 @@ def render_elements_at(elements, px, py):
 # Stage 2 & 3: Python grid renderer + interactive element index
 # ---------------------------------------------------------------------------
 
-# Type priority: higher wins cell ownership
-_PRIORITY = {'T': 1, 'I': 2, 'L': 3, 'F': 4, 'B': 5}
+# Kind code -> kind char. The code is the type priority (higher wins cell
+# ownership, 0 = none) and matches the walkers' JS PRIORITY table, so kinds
+# arrive as small ints and never need a string-keyed lookup in Python.
+_KIND_CHARS = [None, 'T', 'I', 'L', 'F', 'B']
 # Density chars (when no type override)
 _DENSITY_CHARS = {0: ' ', 1: '.', 2: ':', 3: ':', 4: '#', 5: '#', 6: '#', 7: '#'}
 
@@ -234,63 +357,197 @@ def _density_char(count, blocks=False):
     return '@'
 
 
-def render_density_map(data, title="", url="", max_cols=160, blocks=False):
-    """Build and return the text density map from DOM walker data."""
-    vw = data['vw']
-    vh = data['vh']
-    elements = data['elements']
-
-    cols = min(max_cols, vw)
-    cell_px = vw / cols
-    rows = max(1, round(vh / cell_px))
-    # Cap total cells
-    if cols * rows > 16000:
-        rows = 16000 // cols
-
-    # Grid: density count per cell + type kind per cell
-    density = [[0] * cols for _ in range(rows)]
-    kinds = [[None] * cols for _ in range(rows)]
+# Codepoint lookup tables: density LUT is indexed by min(count, 8), kind LUT
+# by kind code (entry 0 is unused — cells without a kind use density).
+_DENSITY_LUT = np.array([ord(_density_char(d)) for d in range(9)], dtype=np.uint32)
+_BLOCK_DENSITY_LUT = np.array([ord(_density_char(d, blocks=True)) for d in range(9)],
+                              dtype=np.uint32)
+_KIND_LUT = np.array([0] + [ord(k) for k in _KIND_CHARS[1:]], dtype=np.uint32)
+_BLOCK_KIND_LUT = np.array([0] + [ord(_BLOCK_TYPES[k]) for k in _KIND_CHARS[1:]],
+                           dtype=np.uint32)
+_SPACE = ord(' ')
+
+
+def _char_grid(density, kinds, blocks=False):
+    """Map (density, kinds) grids to a (rows, cols) array of codepoints."""
+    density_lut = _BLOCK_DENSITY_LUT if blocks else _DENSITY_LUT
+    kind_lut = _BLOCK_KIND_LUT if blocks else _KIND_LUT
+    return np.where(kinds > 0,
+                    np.take(kind_lut, kinds),
+                    np.take(density_lut, np.minimum(density, 8)))
+
+
+def _grid_text(density, kinds, blocks=False):
+    """Render the grid as one newline-separated string with a single decode."""
+    chars = _char_grid(density, kinds, blocks=blocks)
+    # ASCII fast path is one byte per cell; block chars need UTF-32
+    buf = np.empty((chars.shape[0], chars.shape[1] + 1),
+                   dtype='<u4' if blocks else np.uint8)
+    buf[:, :-1] = chars
+    buf[:, -1] = ord('\n')
+    body = buf.reshape(-1)[:-1].tobytes()
+    return body.decode('utf-32-le' if blocks else 'ascii')
+
+
+def _coverage(r0, r1, c0, c1, rows, cols):
+    """Count how many [r0..r1]x[c0..c1] boxes cover each grid cell.
+
+    Uses a 2D difference grid: +1/-1 at the four box corners, then two
+    cumulative sums turn it into per-cell counts.
+    """
+    diff = np.zeros((rows + 1, cols + 1), dtype=np.int32)
+    np.add.at(diff, (r0, c0), 1)
+    np.add.at(diff, (r0, c1 + 1), -1)
+    np.add.at(diff, (r1 + 1, c0), -1)
+    np.add.at(diff, (r1 + 1, c1 + 1), 1)
+    return diff.cumsum(axis=0).cumsum(axis=1)[:rows, :cols]
+
+
+def _rasterize_kernel(x, y, w, h, k, cell_px, rows, cols, density, kinds):
+    """Per-element bbox loop over flat row-major density/kinds (Numba only)."""
+    for i in range(x.shape[0]):
+        c0 = max(0, min(int(x[i] / cell_px), cols - 1))
+        c1 = max(0, min(int((x[i] + w[i] - 1) / cell_px), cols - 1))
+        r0 = max(0, min(int(y[i] / cell_px), rows - 1))
+        r1 = max(0, min(int((y[i] + h[i] - 1) / cell_px), rows - 1))
+        kk = k[i]
+        for r in range(r0, r1 + 1):
+            base = r * cols
+            for idx in range(base + c0, base + c1 + 1):
+                density[idx] += 1
+                if kk > kinds[idx]:
+                    kinds[idx] = kk
 
-    interactive = []
 
-    for el in elements:
-        ex, ey, ew, eh = el['x'], el['y'], el['w'], el['h']
-        kind = el.get('k')
-        is_interactive = el.get('i', False)
+@functools.cache
+def _jit_kernel():
+    """Numba-compiled _rasterize_kernel, or None without numba.
 
-        # Grid cell range this element spans
-        c0 = int(ex / cell_px)
-        c1 = int((ex + ew - 1) / cell_px)
-        r0 = int(ey / cell_px)
-        r1 = int((ey + eh - 1) / cell_px)
+    Imported and compiled on first use so importing this module (and the
+    CLI, which rasterizes in the browser) never pays for numba.
+    """
+    try:
+        from numba import njit
+    except ImportError:  # optional: fall back to the NumPy difference-grid path
+        return None
+    return njit(cache=True, boundscheck=False)(_rasterize_kernel)
+
+
+def _element_arrays(data):
+    """NumPy views of DOM_WALKER_JS's columnar element fields.
+
+    Returns (ex, ey, ew, eh, ek, is_int): float64 boxes, int8 kind codes
+    (_KIND_CHARS index, 0 = none) and a bool interactive mask.
+    """
+    ex = np.asarray(data['xs'], dtype=np.float64)
+    ey = np.asarray(data['ys'], dtype=np.float64)
+    ew = np.asarray(data['ws'], dtype=np.float64)
+    eh = np.asarray(data['hs'], dtype=np.float64)
+    ek = np.asarray(data['ks'], dtype=np.int8)
+    is_int = np.asarray(data['iflag'], dtype=bool)
+    return ex, ey, ew, eh, ek, is_int
+
+
+def _rasterize(ex, ey, ew, eh, ek, cell_px, rows, cols):
+    """Rasterize element boxes into (density, kinds) grids.
+
+    density[r, c] is the number of elements covering the cell; kinds[r, c]
+    is the highest kind code among typed elements covering it (0 = none).
+    """
+    kernel = _jit_kernel()
+    if kernel is not None:
+        density = np.zeros(rows * cols, dtype=np.int32)
+        kinds = np.zeros(rows * cols, dtype=np.int8)
+        kernel(ex, ey, ew, eh, ek, cell_px, rows, cols, density, kinds)
+        return density.reshape(rows, cols), kinds.reshape(rows, cols)
+
+    # Grid cell range each element spans (truncate like int(), then clamp)
+    c0 = np.clip((ex / cell_px).astype(np.int64), 0, cols - 1)
+    c1 = np.clip(((ex + ew - 1) / cell_px).astype(np.int64), 0, cols - 1)
+    r0 = np.clip((ey / cell_px).astype(np.int64), 0, rows - 1)
+    r1 = np.clip(((ey + eh - 1) / cell_px).astype(np.int64), 0, rows - 1)
+
+    # Degenerate boxes (zero width/height) span no cells
+    keep = (c0 <= c1) & (r0 <= r1)
+    c0, c1, r0, r1, ek = c0[keep], c1[keep], r0[keep], r1[keep], ek[keep]
+
+    density = _coverage(r0, r1, c0, c1, rows, cols)
+    kinds = np.zeros((rows, cols), dtype=np.int8)
+    # Ascending priority: later (higher) kinds overwrite earlier ones
+    for k in range(1, len(_KIND_CHARS)):
+        m = ek == k
+        if m.any():
+            kinds[_coverage(r0[m], r1[m], c0[m], c1[m], rows, cols) > 0] = k
+    return density, kinds
+
+
+def _decode_grid(data):
+    """Decode the base64 density/kinds grids returned by DOM_RASTER_JS."""
+    shape = (data['rows'], data['cols'])
+    density = np.frombuffer(base64.b64decode(data['density']), dtype=np.uint8)
+    kinds = np.frombuffer(base64.b64decode(data['kinds']), dtype=np.uint8)
+    return density.reshape(shape), kinds.reshape(shape)
+
+
+def build_grid(data, max_cols=160):
+    """Grid + interactive index from DOM walker data (either JS variant).
+
+    Returns (density, kinds, interactive, cols, rows, cell_px). Pass it to
+    render_density_map / render_sparse_map as grid= to render the same
+    data in several modes while rasterizing once.
+    """
+    vw = data['vw']
+    vh = data['vh']
 
-        c0 = max(0, min(c0, cols - 1))
-        c1 = max(0, min(c1, cols - 1))
-        r0 = max(0, min(r0, rows - 1))
-        r1 = max(0, min(r1, rows - 1))
+    if 'density' in data:
+        # Pre-rasterized in the browser by DOM_RASTER_JS
+        cols, rows = data['cols'], data['rows']
+        cell_px = vw / cols
+        density, kinds = _decode_grid(data)
+        interactive = data['interactive']
+    else:
+        cols = min(max_cols, vw)
+        cell_px = vw / cols
+        rows = max(1, round(vh / cell_px))
+        # Cap total cells
+        if cols * rows > 16000:
+            rows = 16000 // cols
+
+        # Grid: density count per cell + type kind per cell
+        ex, ey, ew, eh, ek, is_int = _element_arrays(data)
+        density, kinds = _rasterize(ex, ey, ew, eh, ek, cell_px, rows, cols)
+
+        # Center of each interactive element in pixel and grid coords
+        idx = np.flatnonzero(is_int)
+        px = (ex[idx] + ew[idx] / 2).astype(np.int64)
+        py = (ey[idx] + eh[idx] / 2).astype(np.int64)
+        gc = ((ex[idx] + ew[idx] / 2) / cell_px).astype(np.int64)
+        gr = ((ey[idx] + eh[idx] / 2) / cell_px).astype(np.int64)
+
+        # First 50 top-to-bottom, left-to-right, ties in document order.
+        # The composite key is unique, so argpartition can select them in
+        # O(n) and only those 50 get sorted.
+        key = (gr * (cols + 2) + gc) * len(idx) + np.arange(len(idx))
+        top = np.argpartition(key, 49)[:50] if len(key) > 50 else np.arange(len(key))
+        order = top[np.argsort(key[top])]
+        interactive = [{
+            'kind': _KIND_CHARS[ek[idx[o]]],
+            'label': data['labels'][o],
+            'gc': int(gc[o]), 'gr': int(gr[o]),
+            'px': int(px[o]), 'py': int(py[o]),
+        } for o in order]
+
+    return density, kinds, interactive, cols, rows, cell_px
+
+
+def render_density_map(data, title="", url="", max_cols=160, blocks=False, grid=None):
+    """Build and return the text density map from DOM walker data."""
+    vw = data['vw']
+    vh = data['vh']
 
-        for r in range(r0, r1 + 1):
-            for c in range(c0, c1 + 1):
-                density[r][c] += 1
-                if kind:
-                    cur = kinds[r][c]
-                    if cur is None or _PRIORITY.get(kind, 0) > _PRIORITY.get(cur, 0):
-                        kinds[r][c] = kind
-
-        if is_interactive:
-            # Center of element in grid coords and pixel coords
-            gc = int((ex + ew / 2) / cell_px)
-            gr = int((ey + eh / 2) / cell_px)
-            interactive.append({
-                'kind': kind,
-                'label': el.get('l', ''),
-                'gc': gc, 'gr': gr,
-                'px': int(ex + ew / 2), 'py': int(ey + eh / 2),
-            })
-
-    # Sort interactive: top-to-bottom, left-to-right
-    interactive.sort(key=lambda e: (e['gr'], e['gc']))
-    interactive = interactive[:50]
+    if grid is None:
+        grid = build_grid(data, max_cols)
+    density, kinds, interactive, cols, rows, cell_px = grid
 
     # Count interactive elements
     n_interactive = len(interactive)
@@ -321,16 +578,7 @@ def render_density_map(data, title="", url="", max_cols=160, blocks=False):
     lines.append(ruler_ones)
 
     # Grid rows
-    for r in range(rows):
-        row_chars = []
-        for c in range(cols):
-            k = kinds[r][c]
-            d = density[r][c]
-            if k:
-                row_chars.append(_BLOCK_TYPES[k] if blocks else k)
-            else:
-                row_chars.append(_density_char(d, blocks=blocks))
-        lines.append(''.join(row_chars))
+    lines.append(_grid_text(density, kinds, blocks=blocks))
 
     # Interactive element index
     if interactive:
@@ -353,84 +601,33 @@ def render_density_map(data, title="", url="", max_cols=160, blocks=False):
 
 
 def _rle_row(chars):
-    """Run-length encode a row of chars. 'BBB@@...' -> 'B3@2.2'"""
-    if not chars:
+    """Run-length encode a row of codepoints. 'BBB@@...' -> 'B3@2.2'
+
+    Returns '' for an all-blank row.
+    """
+    if not len(chars):
         return ''
-    parts = []
-    cur = chars[0]
-    count = 1
-    for ch in chars[1:]:
-        if ch == cur:
-            count += 1
-        else:
-            parts.append(cur if count == 1 else f"{cur}{count}")
-            cur = ch
-            count = 1
-    parts.append(cur if count == 1 else f"{cur}{count}")
-    return ''.join(parts)
+    # Run boundaries: index 0, every value change, and the end
+    changes = np.flatnonzero(np.r_[True, chars[1:] != chars[:-1], True])
+    run_vals = chars[changes[:-1]].tolist()
+    run_lens = np.diff(changes).tolist()
+    if len(run_vals) == 1 and run_vals[0] == _SPACE:
+        return ''
+    return ''.join(chr(v) if n == 1 else f"{chr(v)}{n}"
+                   for v, n in zip(run_vals, run_lens))
 
 
-def render_sparse_map(data, title="", url="", max_cols=160, blocks=False):
+def render_sparse_map(data, title="", url="", max_cols=160, blocks=False, grid=None):
     """Compressed density map: RLE rows + row deduplication."""
     vw = data['vw']
     vh = data['vh']
-    elements = data['elements']
 
-    cols = min(max_cols, vw)
-    cell_px = vw / cols
-    rows = max(1, round(vh / cell_px))
-    if cols * rows > 16000:
-        rows = 16000 // cols
+    if grid is None:
+        grid = build_grid(data, max_cols)
+    density, kinds, interactive, cols, rows, cell_px = grid
 
-    density = [[0] * cols for _ in range(rows)]
-    kinds = [[None] * cols for _ in range(rows)]
-    interactive = []
-
-    for el in elements:
-        ex, ey, ew, eh = el['x'], el['y'], el['w'], el['h']
-        kind = el.get('k')
-        is_interactive = el.get('i', False)
-
-        c0 = max(0, min(int(ex / cell_px), cols - 1))
-        c1 = max(0, min(int((ex + ew - 1) / cell_px), cols - 1))
-        r0 = max(0, min(int(ey / cell_px), rows - 1))
-        r1 = max(0, min(int((ey + eh - 1) / cell_px), rows - 1))
-
-        for r in range(r0, r1 + 1):
-            for c in range(c0, c1 + 1):
-                density[r][c] += 1
-                if kind:
-                    cur = kinds[r][c]
-                    if cur is None or _PRIORITY.get(kind, 0) > _PRIORITY.get(cur, 0):
-                        kinds[r][c] = kind
-
-        if is_interactive:
-            gc = int((ex + ew / 2) / cell_px)
-            gr = int((ey + eh / 2) / cell_px)
-            interactive.append({
-                'kind': kind, 'label': el.get('l', ''),
-                'gc': gc, 'gr': gr,
-                'px': int(ex + ew / 2), 'py': int(ey + eh / 2),
-            })
-
-    interactive.sort(key=lambda e: (e['gr'], e['gc']))
-    interactive = interactive[:50]
-
-    # Build char rows
-    char_rows = []
-    for r in range(rows):
-        row = []
-        for c in range(cols):
-            k = kinds[r][c]
-            d = density[r][c]
-            if k:
-                row.append(_BLOCK_TYPES[k] if blocks else k)
-            else:
-                row.append(_density_char(d, blocks=blocks))
-        char_rows.append(row)
-
-    # RLE encode each row
-    rle_rows = [_rle_row(row) for row in char_rows]
+    # RLE encode each row of codepoints ('' = blank row)
+    rle_rows = [_rle_row(row) for row in _char_grid(density, kinds, blocks=blocks)]
 
     # Build output
     lines = []
@@ -455,10 +652,7 @@ def render_sparse_map(data, title="", url="", max_cols=160, blocks=False):
             j += 1
         count = j - i
 
-        # Check if row is all empty
-        is_empty = all(ch == ' ' for ch in char_rows[i])
-
-        if is_empty:
+        if not rle:
             if count == 1:
                 lines.append(f"r{i}: (empty)")
             else:
@@ -561,27 +755,24 @@ async def run(args):
         if url:
             await cdp.navigate(url, wait=3)
 
-        # Get current page title and URL
-        title_result = await cdp.execute_js("document.title")
-        page_title = title_result.get("result", {}).get("value", "")
-        url_result = await cdp.execute_js("window.location.href")
-        page_url = url_result.get("result", {}).get("value", "")
-
         if at_coord:
             # Reverse lookup mode
             if at_coord[0] == 'g':
-                # Convert grid coords to pixel coords using current viewport
-                vw_result = await cdp.execute_js("window.innerWidth")
-                vw = vw_result.get("result", {}).get("value", 1920)
-                cell_px = vw / max_cols
-                px = int(at_coord[1] * cell_px + cell_px / 2)
-                py = int(at_coord[2] * cell_px + cell_px / 2)
+                # Grid -> pixel conversion happens in the same evaluation
+                js = ELEMENTS_AT_GRID_JS % (at_coord[1], at_coord[2], max_cols)
+                result = await cdp.execute_js(js)
+                if "exceptionDetails" in result:
+                    details = result["exceptionDetails"]
+                    error = details.get("exception", {}).get("description") or details.get("text")
+                    print(f"Error: grid lookup failed: {error}")
+                    return
+                value = result.get("result", {}).get("value") or {}
+                px, py = value.get("px"), value.get("py")
+                elements = value.get("elements")
             else:
                 px, py = at_coord[1], at_coord[2]
-
-            js = ELEMENTS_AT_JS % (px, py)
-            result = await cdp.execute_js(js)
-            elements = result.get("result", {}).get("value")
+                result = await cdp.execute_js(ELEMENTS_AT_JS % (px, py))
+                elements = result.get("result", {}).get("value")
             if not elements:
                 print(f"No elements found at px({px},{py})")
                 return
@@ -589,9 +780,12 @@ async def run(args):
             print(output)
             return
 
-        # Run DOM walker
-        result = await cdp.execute_js(DOM_WALKER_JS)
-        data = result.get("result", {}).get("value")
+        # Title, URL and DOM walker (rasterizes in the browser) in one call
+        result = await cdp.execute_js(PAGE_MAP_JS % max_cols)
+        value = result.get("result", {}).get("value") or {}
+        page_title = value.get("title", "")
+        page_url = value.get("url", "")
+        data = value.get("map")
 
         if not data:
             print("Error: DOM walker returned no data")
@@ -611,7 +805,12 @@ async def run(args):
 
 
 def main():
-    asyncio.run(run(sys.argv[1:]))
+    try:
+        import uvloop
+    except ImportError:  # optional: stdlib event loop
+        asyncio.run(run(sys.argv[1:]))
+    else:
+        uvloop.run(run(sys.argv[1:]))
 
 
 if __name__ == "__main__":